@@ -39,9 +39,13 @@
 ### 21/11/2019 - Oscar: ImageComparator class - knnmatch method modified.
 ### 21/11/2019 - Oscar: ImageComparator class - Plot methods rewritten.
 ### 22/11/2019 - Oscar: ImageComparator class - Score method modified.
+### 19/10/2026 - Oscar: Image class - thumbnail and saveKeypoints methods added.
+### 19/10/2026 - Oscar: ImageComparator class - off-screen rendering of matches added.
+### 19/10/2026 - Oscar: Rendering functions - parallel rendering of matching jobs added.
 ###
 
 ### import Libraries ###
+import multiprocessing
 import numpy as np
 import cv2
 import matplotlib.pyplot as plt
@@ -58,6 +62,8 @@ N_FLANN_CHECKS = 50
 EDGE_THRS = 20 # SIFT edgeThreshold parameter
 N_MATCHES_PLOT = 15
 DEFAULT_N_FEATURES = 15000 # Default number of features for ORB algorithm
+DEFAULT_THUMB_WIDTH = 1024 # Default maximum width in pixels of rendered thumbnails.
+DEFAULT_N_WORKERS = None # Default number of rendering processes, None uses all the cpus.
 
 ### models definitions ###
 sift = cv2.xfeatures2d.SIFT_create(edgeThreshold = EDGE_THRS)
@@ -77,6 +83,97 @@ class NotMatchedError(Error):
     """Raised when the ImageComparator has not runned the match"""
     pass
 
+### rendering helpers ###
+
+# imread flags decoding colour (1) and grayscale (0) images at a fraction of their size.
+REDUCED_FLAGS = {1: {2: cv2.IMREAD_REDUCED_COLOR_2,
+                     4: cv2.IMREAD_REDUCED_COLOR_4,
+                     8: cv2.IMREAD_REDUCED_COLOR_8},
+                 0: {2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+                     4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+                     8: cv2.IMREAD_REDUCED_GRAYSCALE_8}}
+
+def _thumbnail(img, max_width):
+    """
+        Private function to downscale an image to a width of at most max_width pixels.
+
+        It returns the thumbnail and the scale factor with respect to the input image.
+        A None max_width leaves the image untouched.
+    """
+    height, width = img.shape[:2]
+    if max_width is None or width <= max_width:
+        return img, 1.
+
+    scale = max_width / width
+    thumb = cv2.resize(img, (max_width, max(1, int(round(height*scale)))),
+                       interpolation = cv2.INTER_AREA)
+    return thumb, scale
+
+def _load_thumbnail(path, size, flag, max_width):
+    """
+        Private function to load an image from disk directly at thumbnail resolution.
+
+        size is the full resolution shape of the image, it is used to ask the decoder
+        for the coarsest reduced version which is still wider than max_width,
+        so that the full resolution pixels are never decoded.
+        It returns the thumbnail and the scale factor with respect to the original image.
+    """
+    width = size[1]
+    factor = 1
+    if max_width is not None and flag in REDUCED_FLAGS:
+        for reduction in (8, 4, 2):
+            if width / reduction >= max_width:
+                factor = reduction
+                break
+
+    read_flag = REDUCED_FLAGS[flag][factor] if factor > 1 else flag
+    img = cv2.imread(path, read_flag)
+    if img is None:
+        raise IOError('Cannot read image %s' %path)
+
+    thumb, _ = _thumbnail(img, max_width)
+    return thumb, thumb.shape[1] / width
+
+def _pack_keypoints(keypoints):
+    """
+        Private function to convert keypoints objects into picklable tuples.
+    """
+    return [(kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave, kp.class_id)
+            for kp in keypoints]
+
+def _unpack_keypoints(keypoints, scale = 1.):
+    """
+        Private function to rebuild keypoints objects from tuples, rescaling them by scale.
+    """
+    return [cv2.KeyPoint(x*scale, y*scale, size*scale, angle, response, octave, class_id)
+            for (x, y, size, angle, response, octave, class_id) in keypoints]
+
+def _draw_job(img_1, scale_1, img_2, scale_2, job):
+    """
+        Private function to draw the matches of a rendering job on two thumbnails.
+
+        It returns the image with the two thumbnails side by side and the matches drawn.
+    """
+    keypoints_1 = _unpack_keypoints(job['keypoints_1'], scale_1)
+    keypoints_2 = _unpack_keypoints(job['keypoints_2'], scale_2)
+    matches = [cv2.DMatch(query_idx, train_idx, distance)
+               for (query_idx, train_idx, distance) in job['matches']]
+
+    return cv2.drawMatches(img_1, keypoints_1, img_2, keypoints_2, matches, None,
+                           matchColor = (0,255,0),
+                           flags = cv2.DrawMatchesFlags_NOT_DRAW_SINGLE_POINTS)
+
+def _write_image(path_out, img):
+    """
+        Private function to write an image to file, raising an error if openCV fails to.
+
+        It returns path_out.
+    """
+    if not cv2.imwrite(path_out, img):
+        raise IOError('Cannot write image %s' %path_out)
+
+    return path_out
+
 ### Image class ###
 
 class Image:
@@ -107,6 +204,9 @@ class Image:
         path_ : str
                 Path location of the file.
 
+        flag_ : int
+                imread flag used to load the file.
+
         img_  : obj
                 Image object.
 
@@ -133,6 +233,7 @@ class Image:
             Another attribute comes from the imread() method from openCV.
         """
         self.path_ = path_to_file
+        self.flag_ = flag
         self.img_ = cv2.imread(self.path_, flag)
         self.size_ = self.img_.shape
 
@@ -207,6 +308,33 @@ class Image:
         plt.figure(figsize= figsize)
         plt.imshow(self.img_), plt.show()
 
+    def thumbnail(self, max_width = DEFAULT_THUMB_WIDTH):
+        """
+            Method to get a downscaled copy of the image.
+
+            max_width is the maximum width in pixels of the thumbnail.
+            It returns the thumbnail and the scale factor with respect to the image.
+        """
+        return _thumbnail(self.img_, max_width)
+
+    def saveKeypoints(self, path_out, max_width = DEFAULT_THUMB_WIDTH):
+        """
+            Method to draw the keypoints on a thumbnail of the image and write it to file.
+
+            Unlike plotKeypoints it does not need a display.
+            path_out is the path of the file to write, its extension sets the format.
+            max_width is the maximum width in pixels of the thumbnail.
+            It returns path_out.
+        """
+        if not hasattr(self, 'keypoints_'):
+            raise NotFittedError('Run find_keypoints before plotting')
+
+        thumb, scale = self.thumbnail(max_width)
+        keypoints = _unpack_keypoints(_pack_keypoints(self.keypoints_), scale)
+        img_to_save = cv2.drawKeypoints(thumb, keypoints, None)
+
+        return _write_image(path_out, img_to_save)
+
 ### Image comparator class ###
 
 class ImageComparator:
@@ -479,3 +607,125 @@ class ImageComparator:
 
         plt.figure(figsize=figsize)
         plt.imshow(img_to_plot), plt.show()
+
+    def __matches_to_render(self, n_matches, threshold):
+        """
+            Private method to choose the matches to render off-screen.
+
+            As in plot_matching, the matches of match take precedence over those of knnmatch.
+            For match these are the n_matches best matches,
+            for knnmatch the n_matches best matches passing the ratio test with threshold.
+            n_matches has to be a non negative integer.
+            It returns the list of matches.
+        """
+        if isinstance(n_matches, bool) or not isinstance(n_matches, int) or n_matches < 0:
+            raise ValueError('n_matches has to be a non negative integer, got %s' %n_matches)
+
+        if hasattr(self, 'matches_'):
+            return self.__matches_to_plot_classic(n_matches)
+        elif hasattr(self, 'knnmatches_'):
+            good_matches = self.__ratio_test(self.knnmatches_, threshold, option = 'List')
+            return good_matches[:n_matches]
+        else:
+            raise NotMatchedError('Run a match method before rendering.')
+
+    def matching_job(self, Image_1, Image_2, path_out,
+                     n_matches = N_MATCHES_PLOT,
+                     threshold = LOWE_THRS,
+                     max_width = DEFAULT_THUMB_WIDTH):
+        """
+            method to collect everything needed to render the matching to file.
+
+            path_out is the path of the file to write.
+            n_matches is a non negative int, the number of best matches to render.
+            threshold is the ratio test threshold applied to the matches of knnmatch,
+            unlike plot_matching only the n_matches best of those passing it are rendered.
+            max_width is the maximum width in pixels of each image thumbnail.
+
+            It returns a dictionary holding only paths, sizes and read flags of the images and
+            the matched keypoints, so that it is cheap to send to another process.
+            The pixels are reloaded, already downscaled, by render_matching.
+        """
+        if not (hasattr(Image_1, 'keypoints_') and hasattr(Image_2, 'keypoints_')):
+            raise NotFittedError('Run find_keypoints before matching')
+
+        matches = self.__matches_to_render(n_matches, threshold)
+
+        # keep only the matched keypoints and re-index the matches on them
+        query_idx = sorted({match.queryIdx for match in matches})
+        train_idx = sorted({match.trainIdx for match in matches})
+        query_map = {old: new for new, old in enumerate(query_idx)}
+        train_map = {old: new for new, old in enumerate(train_idx)}
+
+        return dict(path_out = path_out,
+                    max_width = max_width,
+                    image_1 = (Image_1.path_, Image_1.size_, Image_1.flag_),
+                    image_2 = (Image_2.path_, Image_2.size_, Image_2.flag_),
+                    keypoints_1 = _pack_keypoints([Image_1.keypoints_[i] for i in query_idx]),
+                    keypoints_2 = _pack_keypoints([Image_2.keypoints_[i] for i in train_idx]),
+                    matches = [(query_map[match.queryIdx], train_map[match.trainIdx], match.distance)
+                               for match in matches])
+
+    def save_matching(self, Image_1, Image_2, path_out,
+                      n_matches = N_MATCHES_PLOT,
+                      threshold = LOWE_THRS,
+                      max_width = DEFAULT_THUMB_WIDTH):
+        """
+            method to draw the images with feature matching on thumbnails and write them to file.
+
+            Unlike plot_matching it does not need a display and does not block.
+            Arguments are the same as matching_job, images already loaded in memory are used.
+            It returns path_out.
+        """
+        job = self.matching_job(Image_1, Image_2, path_out, n_matches, threshold, max_width)
+        img_1, scale_1 = Image_1.thumbnail(max_width)
+        img_2, scale_2 = Image_2.thumbnail(max_width)
+
+        return _write_image(path_out, _draw_job(img_1, scale_1, img_2, scale_2, job))
+
+### rendering functions ###
+
+def render_matching(job):
+    """
+        Function to render a job built by ImageComparator.matching_job to file.
+
+        The images are decoded from disk directly at thumbnail resolution.
+        It returns the path of the written file.
+    """
+    max_width = job['max_width']
+    img_1, scale_1 = _load_thumbnail(*job['image_1'], max_width)
+    img_2, scale_2 = _load_thumbnail(*job['image_2'], max_width)
+
+    return _write_image(job['path_out'], _draw_job(img_1, scale_1, img_2, scale_2, job))
+
+def _init_worker():
+    """
+        Private function initialising rendering processes.
+        openCV threads are disabled, parallelism comes from the pool itself.
+    """
+    cv2.setNumThreads(1)
+
+def rendering_pool(n_workers = DEFAULT_N_WORKERS):
+    """
+        Function to create a pool of processes for render_matching.
+
+        n_workers is the number of processes, None uses all the cpus.
+        It returns a multiprocessing Pool, to be used in a with statement.
+        Jobs can be sent to it as soon as they are built, e.g. with pool.map_async(render_matching, jobs),
+        their results have to be collected before leaving the with statement, which terminates the pool.
+    """
+    return multiprocessing.Pool(n_workers, initializer = _init_worker)
+
+def render_matchings(jobs, n_workers = DEFAULT_N_WORKERS):
+    """
+        Function to render a list of matching jobs on a pool of processes.
+
+        jobs is a list of dictionaries built by ImageComparator.matching_job.
+        n_workers is the number of processes, None uses all the cpus and 1 renders in this process.
+        It returns the list of written paths, in the same order as jobs.
+    """
+    if n_workers == 1:
+        return [render_matching(job) for job in jobs]
+
+    with rendering_pool(n_workers) as pool:
+        return pool.map(render_matching, jobs)
@@ -0,0 +1,120 @@
+###
+### Report-generation.py
+###
+### Created by Oscar de Felice on 19/10/2026.
+### Copyright © 2026 Oscar de Felice.
+###
+### This program is free software: you can redistribute it and/or modify
+### it under the terms of the GNU General Public License as published by
+### the Free Software Foundation, either version 3 of the License, or
+### (at your option) any later version.
+###
+### This program is distributed in the hope that it will be useful,
+### but WITHOUT ANY WARRANTY; without even the implied warranty of
+### MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+### GNU General Public License for more details.
+###
+### You should have received a copy of the GNU General Public License
+### along with this program. If not, see <http://www.gnu.org/licenses/>.
+###
+########################################################################
+###
+### Report-generation.py
+### This is the script to write the matching evidence of the top candidates of each probe
+### to image files, and to time the report generation per probe.
+### It makes use of OsIm module.
+###
+### 19/10/2026 - Oscar: Creation of this script.
+###
+###
+
+### Import libraries ###
+import matplotlib
+matplotlib.use('Agg') # plot_matching baseline is saved to file, no display needed
+import matplotlib.pyplot as plt
+import OsIm
+import glob
+import os
+import time
+import warnings
+
+### Model selection
+model = 'surf'
+model_compare = 'bf'
+
+### Constants of the script
+probes_dir = 'path/to/probes_dir'
+images_dir = 'path/to/images_dir'
+report_dir = 'path/to/report_dir'
+top_k = 5 # Number of candidates rendered for each probe
+n_workers = None # Number of rendering processes, None uses all the cpus
+baseline = False # Benchmark also the matplotlib plot_matching rendering of the same candidates
+
+if __name__ == '__main__':
+
+    os.makedirs(report_dir, exist_ok = True)
+
+    ### List of image paths
+    probes_path = glob.glob(probes_dir)
+    images_path = glob.glob(images_dir)
+
+    ### Instantiate Image objects and find keypoints using the model selected
+    images = [OsIm.Image(image).find_keypoints(model_name = model) for image in images_path]
+
+    ### Comparator object istance
+    comparator = OsIm.ImageComparator(matcher = model_compare)
+
+    ### Compute matches and render the top candidates of each probe as soon as they are known
+    matching_time = 0.
+    candidates = []
+    results = []
+    start_report = time.perf_counter()
+    with OsIm.rendering_pool(n_workers) as pool:
+        for i, probe_path in enumerate(probes_path):
+            start = time.perf_counter()
+            probe = OsIm.Image(probe_path).find_keypoints(model_name = model)
+
+            scores = []
+            for j, image in enumerate(images):
+                comparator.knnmatch(probe, image, model_name = model)
+                path_out = os.path.join(report_dir, 'probe%04d_image%04d.jpg' %(i, j))
+                job = comparator.matching_job(probe, image, path_out)
+                scores.append((comparator.score(), j, job, comparator.knnmatches_))
+            scores = sorted(scores, key = lambda x: x[0], reverse = True)[:top_k]
+
+            results.append(pool.map_async(OsIm.render_matching, [job for (_, _, job, _) in scores]))
+            if baseline:
+                candidates.append((probe_path, [(j, job, knnmatches) for (_, j, job, knnmatches) in scores]))
+            matching_time += time.perf_counter() - start
+
+        for result in results:
+            result.get()
+    report_time = time.perf_counter() - start_report
+
+    n_probes = max(len(probes_path), 1)
+    print('Matching time per probe: %.3f s' %(matching_time/n_probes))
+    print('Report generation time per probe: %.3f s' %(report_time/n_probes))
+
+    ### Baseline: the same candidates rendered in this process, off-screen and by plot_matching
+    if baseline:
+        rendering_time = 0.
+        baseline_time = 0.
+        for probe_path, probe_candidates in candidates:
+            probe = OsIm.Image(probe_path).find_keypoints(model_name = model)
+            for (j, job, knnmatches) in probe_candidates:
+                start = time.perf_counter()
+                OsIm.render_matching(job)
+                rendering_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                comparator.knnmatches_ = knnmatches
+                with warnings.catch_warnings(): # plt.show is a no-op with Agg
+                    warnings.simplefilter('ignore', UserWarning)
+                    comparator.plot_matching(probe, images[j])
+                plt.savefig(os.path.splitext(job['path_out'])[0] + '_plt.jpg')
+                plt.close()
+                baseline_time += time.perf_counter() - start
+
+        print('Rendering time per probe: %.3f s' %(rendering_time/n_probes))
+        print('Baseline plot_matching rendering time per probe: %.3f s' %(baseline_time/n_probes))
+        print('Rendering speedup: %.1fx' %(baseline_time/max(rendering_time, 1e-9)))
@@ -25,8 +25,116 @@
 ###
 ### 22/11/2019 - Oscar: Creation of this script.
 ### 25/11/2019 - Oscar: Comments added.
+### 19/10/2026 - Oscar: Tests for the off-screen rendering functions added.
 ###
 ###
 
+### Import libraries ###
+import numpy as np
+import cv2
+import pytest
+
+try:
+    import OsIm
+except cv2.error: # openCV builds without non-free modules, as the pip ones, cannot create SURF
+    OsIm = None
+
+requires_osim = pytest.mark.skipif(OsIm is None, reason = 'OsIm cannot be imported with this openCV build')
+
+### Fixtures ###
+
+@pytest.fixture
+def synthetic_images(tmp_path):
+    """
+        Two smooth random images, the second one a shifted copy of the first,
+        written to disk and fitted with ORB keypoints.
+    """
+    rng = np.random.RandomState(0)
+    img = cv2.GaussianBlur((rng.rand(480, 640, 3)*255).astype(np.uint8), (7, 7), 2)
+    path_1 = str(tmp_path / 'image_1.png')
+    path_2 = str(tmp_path / 'image_2.png')
+    cv2.imwrite(path_1, img)
+    cv2.imwrite(path_2, np.roll(img, 20, axis = 1))
+
+    image_1 = OsIm.Image(path_1).find_keypoints(model_name = 'orb')
+    image_2 = OsIm.Image(path_2).find_keypoints(model_name = 'orb')
+    return image_1, image_2
+
 def test_placeholder():
     pass
+
+### Rendering tests ###
+
+@requires_osim
+def test_thumbnail_scale():
+    img = np.zeros((300, 400, 3), np.uint8)
+
+    thumb, scale = OsIm._thumbnail(img, 100)
+    assert thumb.shape == (75, 100, 3)
+    assert scale == 0.25
+
+    thumb, scale = OsIm._thumbnail(img, 800)
+    assert thumb is img
+    assert scale == 1.
+
+@requires_osim
+@pytest.mark.parametrize('max_width, factor', [(1000, 1), (400, 2), (200, 4), (100, 8), (50, 8)])
+def test_load_thumbnail_reduced_factor(tmp_path, monkeypatch, max_width, factor):
+    path = str(tmp_path / 'image.png')
+    cv2.imwrite(path, np.zeros((600, 800, 3), np.uint8))
+
+    flags = []
+    imread = cv2.imread
+    def recording_imread(path, flag):
+        flags.append(flag)
+        return imread(path, flag)
+    monkeypatch.setattr(OsIm.cv2, 'imread', recording_imread)
+
+    thumb, scale = OsIm._load_thumbnail(path, (600, 800, 3), 1, max_width)
+
+    expected_flag = OsIm.REDUCED_FLAGS[1][factor] if factor > 1 else 1
+    assert flags == [expected_flag]
+    assert thumb.shape[1] == min(max_width, 800)
+    assert scale == thumb.shape[1] / 800
+
+@requires_osim
+def test_matching_job_reindexes_keypoints(synthetic_images, tmp_path):
+    image_1, image_2 = synthetic_images
+    comparator = OsIm.ImageComparator('bf').match(image_1, image_2)
+
+    job = comparator.matching_job(image_1, image_2, str(tmp_path / 'job.png'))
+
+    assert len(job['matches']) == OsIm.N_MATCHES_PLOT
+    for (query_idx, train_idx, _), match in zip(job['matches'], comparator.matches_):
+        assert job['keypoints_1'][query_idx][:2] == image_1.keypoints_[match.queryIdx].pt
+        assert job['keypoints_2'][train_idx][:2] == image_2.keypoints_[match.trainIdx].pt
+    assert len(job['keypoints_1']) == len({m.queryIdx for m in comparator.matches_[:OsIm.N_MATCHES_PLOT]})
+
+@requires_osim
+@pytest.mark.parametrize('n_matches', [30.0, -1, '15'])
+def test_matching_job_rejects_invalid_n_matches(synthetic_images, tmp_path, n_matches):
+    image_1, image_2 = synthetic_images
+    comparator = OsIm.ImageComparator('bf').match(image_1, image_2)
+
+    with pytest.raises(ValueError):
+        comparator.matching_job(image_1, image_2, str(tmp_path / 'job.png'), n_matches = n_matches)
+
+@requires_osim
+def test_render_and_save_matching_same_shape(synthetic_images, tmp_path):
+    image_1, image_2 = synthetic_images
+    comparator = OsIm.ImageComparator('bf').match(image_1, image_2)
+    job = comparator.matching_job(image_1, image_2, str(tmp_path / 'rendered.png'), max_width = 320)
+
+    rendered = cv2.imread(OsIm.render_matching(job))
+    saved = cv2.imread(comparator.save_matching(image_1, image_2, str(tmp_path / 'saved.png'), max_width = 320))
+
+    assert rendered.shape == saved.shape == (240, 640, 3)
+
+@requires_osim
+def test_render_matching_write_failure(synthetic_images, tmp_path):
+    image_1, image_2 = synthetic_images
+    comparator = OsIm.ImageComparator('bf').match(image_1, image_2)
+    job = comparator.matching_job(image_1, image_2, str(tmp_path / 'missing' / 'job.png'))
+
+    with pytest.raises(IOError):
+        OsIm.render_matching(job)